@@ -231,13 +231,18 @@ class RequestValidator:
             "xml_dom_helper": ["create_parser", "parse_string", "parse_file", "get_elements_by_tag_name",
                               "get_elements_by_tag_name_from_node", "get_attribute", "set_attribute",
                               "has_attribute", "get_child_nodes", "get_first_child", "get_node_value",
+                              "get_node_values", "set_attributes",
                               "get_tag_name", "is_element_node", "get_text_contents", "to_string",
                               "dispose_document", "get_nodelist_length", "get_nodelist_item",
                               "create_element", "create_text_node", "remove_attribute", "append_child",
                               "remove_child", "replace_child", "insert_before", "clone_node",
                               "get_parent_node", "get_module_info", "xql_query", "xql_find_nodes",
                               "xql_find_value", "xql_exists", "get_document_root"],
-            "xpath": ["new", "find", "findnodes", "findvalue", "exists"],
+            "xpath": ["new", "find", "findnodes", "findvalue", "exists",
+                     "load_file", "load_file_streaming", "load_xml_string", "find_nodes", "find_in_node",
+                     "bulk_xpath", "dispose_document", "pin_node", "get_node_data",
+                     "release_node", "release_nodes", "compile_xpath",
+                     "release_expression"],
             "http_helper": ["lwp_request", "get", "post", "put", "delete", "head"],
             "datetime_helper": ["format_date", "parse_date", "add_days", "diff_days", "now"],
             "crypto": ["new", "encrypt", "decrypt", "cleanup_cipher", "hash", "generate_key", "sign", "verify"],
@@ -567,7 +567,7 @@ def _close_workbook_basic(workbook_id: str) -> Dict[str, Any]:
     
     # Save first worksheet as CSV
     if wb_data['worksheets']:
-        first_ws = list(wb_data['worksheets'].values())[0]
+        first_ws = next(iter(wb_data['worksheets'].values()))
         worksheet = first_ws['worksheet']
         max_row = first_ws['max_row']
         max_col = first_ws['max_col']
@@ -9,7 +9,7 @@ and XPath/XQL integration.
 
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
-import uuid
+import itertools
 import time
 import copy
 import traceback
@@ -33,14 +33,21 @@ NODE_LISTS = {}
 # Configuration
 DEBUG_MODE = False
 
-def _debug(message: str):
-    """Debug logging helper"""
+# Handle IDs are only meaningful inside this process, so a counter is enough;
+# the PID prefix keeps IDs from different bridge processes distinct.
+_ID_PREFIX = f"{os.getpid():x}-"
+_ID_COUNTER = itertools.count(1)
+
+def _debug(message: str, *args):
+    """Debug logging helper (arguments are %-formatted only when enabled)"""
     if DEBUG_MODE:
+        if args:
+            message = message % args
         print(f"[XML_DOM_DEBUG] {message}")
 
 def _generate_id() -> str:
     """Generate unique identifier"""
-    return str(uuid.uuid4())
+    return f"{_ID_PREFIX}{next(_ID_COUNTER)}"
 
 class XMLDOMException(Exception):
     """Base exception for XML DOM operations"""
@@ -78,7 +85,7 @@ def create_parser(**options) -> Dict[str, Any]:
         }
 
         PARSERS[parser_id] = parser_config
-        _debug(f"Created parser: {parser_id}")
+        _debug("Created parser: %s", parser_id)
 
         return {
             'success': True,
@@ -130,7 +137,7 @@ def parse_string(parser_id: str, xml_string: str) -> Dict[str, Any]:
         # Create root node reference
         root_node_id = _create_node_reference(root, document_id)
 
-        _debug(f"Parsed XML document: {document_id}")
+        _debug("Parsed XML document: %s", document_id)
 
         return {
             'success': True,
@@ -212,21 +219,22 @@ def _create_node_reference(element: ET.Element, document_id: str) -> str:
     """
     node_id = _generate_id()
 
-    node_info = {
+    # Single dict store; this runs once per node handed back to Perl
+    NODES[node_id] = {
         'node_id': node_id,
         'element': element,
         'document_id': document_id,
         'created_at': time.time()
     }
-
-    NODES[node_id] = node_info
     return node_id
 
 def _get_node(node_id: str) -> Optional[ET.Element]:
     """Get ElementTree element by node ID"""
-    if node_id in NODES:
-        return NODES[node_id]['element']
-    return None
+    # One hash lookup instead of a membership test followed by indexing
+    node_info = NODES.get(node_id)
+    if node_info is None:
+        return None
+    return node_info['element']
 
 def _get_document(document_id: str) -> Optional[Dict]:
     """Get document by document ID"""
@@ -266,7 +274,7 @@ def get_elements_by_tag_name(document_id: str, tag_name: str) -> Dict[str, Any]:
         # Create NodeList
         nodelist_id = _create_node_list(matching_elements)
 
-        _debug(f"Found {len(matching_elements)} elements with tag '{tag_name}'")
+        _debug("Found %d elements with tag '%s'", len(matching_elements), tag_name)
 
         return {
             'success': True,
@@ -314,7 +322,7 @@ def get_elements_by_tag_name_from_node(node_id: str, tag_name: str) -> Dict[str,
         # Create NodeList
         nodelist_id = _create_node_list(matching_elements)
 
-        _debug(f"Found {len(matching_elements)} elements with tag '{tag_name}' under node")
+        _debug("Found %d elements with tag '%s' under node", len(matching_elements), tag_name)
 
         return {
             'success': True,
@@ -361,7 +369,7 @@ def get_child_nodes(node_id: str) -> Dict[str, Any]:
         # Create NodeList for children
         nodelist_id = _create_node_list(child_node_ids)
 
-        _debug(f"Node has {len(child_node_ids)} child nodes")
+        _debug("Node has %d child nodes", len(child_node_ids))
 
         return {
             'success': True,
@@ -615,6 +623,43 @@ def get_node_value(node_id: str) -> Dict[str, Any]:
             'error': f'getNodeValue failed: {str(e)}'
         }
 
+def get_node_values(node_ids: List[str]) -> Dict[str, Any]:
+    """
+    Get direct text values for several nodes in one call
+
+    Batch form of get_node_value() so callers iterating an XQL result
+    pay one bridge round-trip instead of one per node.
+
+    Args:
+        node_ids: List of node IDs
+
+    Returns:
+        Dictionary with values in the same order as node_ids
+    """
+    try:
+        values = []
+        for node_id in node_ids:
+            node_info = NODES.get(node_id)
+            if node_info is None:
+                return {
+                    'success': False,
+                    'error': f'Invalid node ID: {node_id}'
+                }
+            values.append(node_info['element'].text or "")
+
+        return {
+            'success': True,
+            'result': {
+                'values': values
+            }
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'getNodeValues failed: {str(e)}'
+        }
+
 def is_element_node(node_id: str) -> Dict[str, Any]:
     """
     Check if node is an element node (matches isElementNode())
@@ -813,7 +858,7 @@ def dispose_document(document_id: str) -> Dict[str, Any]:
         for node_id in nodes_to_remove:
             del NODES[node_id]
 
-        _debug(f"Disposed document: {document_id}")
+        _debug("Disposed document: %s", document_id)
 
         return {
             'success': True,
@@ -1036,6 +1081,51 @@ def set_attribute(node_id: str, attr_name: str, value: str) -> Dict[str, Any]:
             'error': f'setAttribute failed: {str(e)}'
         }
 
+def set_attributes(updates: List[List[Any]]) -> Dict[str, Any]:
+    """
+    Set attributes on several elements in one call
+
+    All node IDs and attribute names are validated before any element is
+    modified, so a bad entry leaves the document untouched.
+
+    Args:
+        updates: List of (node_id, attr_name, value) triples
+
+    Returns:
+        Dictionary with number of attributes set
+    """
+    try:
+        resolved = []
+        for node_id, attr_name, value in updates:
+            node = _get_node(node_id)
+            if node is None:
+                return {
+                    'success': False,
+                    'error': f'Invalid node ID: {node_id}'
+                }
+            if not attr_name:
+                return {
+                    'success': False,
+                    'error': 'Attribute name is required'
+                }
+            resolved.append((node, attr_name, str(value) if value is not None else ""))
+
+        for node, attr_name, value in resolved:
+            node.set(attr_name, value)
+
+        return {
+            'success': True,
+            'result': {
+                'count': len(resolved)
+            }
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'setAttributes failed: {str(e)}'
+        }
+
 def has_attribute(node_id: str, attr_name: str) -> Dict[str, Any]:
     """
     Check if element has an attribute
@@ -1585,7 +1675,7 @@ def xql_query(node_id: str, xpath_expression: str) -> Dict[str, Any]:
             }
         document_id = node_info['document_id']
 
-        _debug(f"Executing XQL query: {xpath_expression} on node {node_id}")
+        _debug("Executing XQL query: %s on node %s", xpath_expression, node_id)
 
         lxml_success = False
         if LXML_AVAILABLE:
@@ -1608,7 +1698,7 @@ def xql_query(node_id: str, xpath_expression: str) -> Dict[str, Any]:
                     et_xpath = '.' + xpath_expression
 
                 results = source_node.findall(et_xpath)
-                _debug(f"ElementTree XPath results: {len(results)}")
+                _debug("ElementTree XPath results: %d", len(results))
             except Exception as e:
                 return {
                     'success': False,
@@ -1620,19 +1710,21 @@ def xql_query(node_id: str, xpath_expression: str) -> Dict[str, Any]:
             # Node list result (most common case for XQL)
             node_ids = []
 
-            _debug(f"Processing {len(results)} XPath results")
+            _debug("Processing %d XPath results", len(results))
 
             for i, result_node in enumerate(results):
                 if lxml_success:
                     # lxml result
                     if hasattr(result_node, 'tag'):  # Element node
                         try:
-                            _debug(f"Converting lxml result {i}: tag={result_node.tag}, attrib={dict(result_node.attrib)}")
+                            if DEBUG_MODE:
+                                _debug("Converting lxml result %d: tag=%s, attrib=%s",
+                                       i, result_node.tag, dict(result_node.attrib))
                             converted_node_id = _convert_from_lxml(result_node, document_id)
                             node_ids.append(converted_node_id)
-                            _debug(f"Successfully converted result {i} to node_id: {converted_node_id}")
+                            _debug("Successfully converted result %d to node_id: %s", i, converted_node_id)
                         except Exception as e:
-                            _debug(f"Failed to convert lxml result {i}: {str(e)}")
+                            _debug("Failed to convert lxml result %d: %s", i, e)
                             continue
                 else:
                     # ElementTree result
@@ -7,11 +7,74 @@ for use in the RHEL 9 migration project.
 """
 
 import xml.etree.ElementTree as ET
+from xml.parsers import expat
 import re
 import os
 import sys
-from typing import Dict, Any, Union, Optional
+from typing import Dict, Any, Union, Optional, BinaryIO
 import traceback
+from collections import namedtuple
+from functools import lru_cache
+
+# Read once at import; tracebacks are only formatted when enabled
+_DEBUG_MODE = os.environ.get('CPAN_BRIDGE_DEBUG', '0') != '0'
+
+# Entity tables for escape_xml/unescape_xml, built once at import
+_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&apos;',
+})
+_UNESCAPE_MAP = {
+    '&amp;': '&',
+    '&lt;': '<',
+    '&gt;': '>',
+    '&quot;': '"',
+    '&apos;': "'",
+}
+_UNESCAPE_RE = re.compile(r'&(?:amp|lt|gt|quot|apos);')
+_NEEDS_ESCAPE = re.compile(r'[&<>"\']').search
+
+# XML content starts with '<', possibly after whitespace
+_XML_PREFIX_CHECK = re.compile(r'\s*<').match
+
+# '@name' -> interned 'name', so repeated attributes in xml_out share one
+# key string across elements (bounded; keys come from caller data)
+_ATTR_NAME_CACHE: Dict[str, str] = {}
+_ATTR_NAME_CACHE_MAX = 4096
+
+# Only short values are memoized; large payloads rarely repeat
+_ESCAPE_CACHE_MAX_LEN = 512
+
+# Files are fed to the parser in chunks of this size
+_PARSE_CHUNK_SIZE = 64 * 1024
+
+# Sentinel for single-lookup dict probes
+_MISSING = object()
+
+# XML::Simple options resolved once per xml_in call rather than per element
+_ConvertOptions = namedtuple('_ConvertOptions', 'keep_attributes empty_value empty_as_hash')
+
+def _unescape_entity(match) -> str:
+    return _UNESCAPE_MAP[match.group(0)]
+
+def _escape_impl(value: str) -> str:
+    # Most values contain nothing to escape
+    if _NEEDS_ESCAPE(value) is None:
+        return value
+    return value.translate(_ESCAPE_TABLE)
+
+def _unescape_impl(value: str) -> str:
+    # Every entity starts with '&'; each one is replaced exactly once,
+    # so '&amp;lt;' still yields '&lt;'
+    if '&' not in value:
+        return value
+    return _UNESCAPE_RE.sub(_unescape_entity, value)
+
+_escape_cached = lru_cache(maxsize=4096)(_escape_impl)
+_unescape_cached = lru_cache(maxsize=4096)(_unescape_impl)
 
 def xml_in(source: str, source_type: str = 'auto', options: Dict[str, Any] = None) -> Dict[str, Any]:
     """
@@ -36,25 +99,27 @@ def xml_in(source: str, source_type: str = 'auto', options: Dict[str, Any] = Non
         # Get XML content based on source type
         xml_content = _get_xml_content(source, source_type)
         
-        # Parse XML
-        root = ET.fromstring(xml_content)
-        
-        # Convert to Perl-compatible dict structure
-        result = _xml_element_to_dict(root, options)
+        # Parse XML straight into a Perl-compatible dict structure
+        opts = _resolve_convert_options(options)
+        if isinstance(xml_content, str):
+            result = _xml_to_dict(xml_content, opts)
+        else:
+            with xml_content:
+                result = _xml_to_dict(xml_content, opts)
         
         # Handle KeepRoot option (XML::Simple compatibility)
         keep_root = options.get('KeepRoot', 1)
         if not keep_root:
             # Remove the root element wrapper
             if isinstance(result, dict) and len(result) == 1:
-                result = list(result.values())[0]
+                result = next(iter(result.values()))
         
         return {
             'success': True,
             'result': result
         }
         
-    except ET.ParseError as e:
+    except expat.ExpatError as e:
         return {
             'success': False,
             'error': f"XML Parse Error: {str(e)}",
@@ -77,7 +142,7 @@ def xml_in(source: str, source_type: str = 'auto', options: Dict[str, Any] = Non
             'success': False,
             'error': f"Unexpected error: {str(e)}",
             'error_type': type(e).__name__,
-            'traceback': traceback.format_exc() if _is_debug_mode() else None
+            'traceback': traceback.format_exc() if _DEBUG_MODE else None
         }
 
 def xml_out(data: Any, options: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -121,7 +186,7 @@ def xml_out(data: Any, options: Dict[str, Any] = None) -> Dict[str, Any]:
             'success': False,
             'error': f"XML generation error: {str(e)}",
             'error_type': type(e).__name__,
-            'traceback': traceback.format_exc() if _is_debug_mode() else None
+            'traceback': traceback.format_exc() if _DEBUG_MODE else None
         }
 
 def escape_xml(value: str) -> Dict[str, Any]:
@@ -132,12 +197,10 @@ def escape_xml(value: str) -> Dict[str, Any]:
         if not isinstance(value, str):
             value = str(value)
         
-        # XML character escaping
-        value = value.replace('&', '&amp;')
-        value = value.replace('<', '&lt;')
-        value = value.replace('>', '&gt;')
-        value = value.replace('"', '&quot;')
-        value = value.replace("'", '&apos;')
+        if len(value) <= _ESCAPE_CACHE_MAX_LEN:
+            value = _escape_cached(value)
+        else:
+            value = _escape_impl(value)
         
         return {
             'success': True,
@@ -157,12 +220,10 @@ def unescape_xml(value: str) -> Dict[str, Any]:
         if not isinstance(value, str):
             value = str(value)
         
-        # XML character unescaping
-        value = value.replace('&lt;', '<')
-        value = value.replace('&gt;', '>')
-        value = value.replace('&quot;', '"')
-        value = value.replace('&apos;', "'")
-        value = value.replace('&amp;', '&')  # Must be last
+        if len(value) <= _ESCAPE_CACHE_MAX_LEN:
+            value = _unescape_cached(value)
+        else:
+            value = _unescape_impl(value)
         
         return {
             'success': True,
@@ -182,7 +243,7 @@ def _detect_source_type(source: str) -> str:
         return 'unknown'
     
     # Check for XML content (starts with < possibly after whitespace)
-    if re.match(r'^\s*<', source):
+    if _XML_PREFIX_CHECK(source):
         return 'string'
     
     # Check for URL
@@ -192,8 +253,8 @@ def _detect_source_type(source: str) -> str:
     # Assume file path
     return 'file'
 
-def _get_xml_content(source: str, source_type: str) -> str:
-    """Get XML content from various source types"""
+def _get_xml_content(source: str, source_type: str) -> Union[str, BinaryIO]:
+    """Get XML content from various source types (files are returned open in binary mode)"""
     if source_type == 'string':
         return source
     
@@ -205,14 +266,8 @@ def _get_xml_content(source: str, source_type: str) -> str:
         if not os.access(source, os.R_OK):
             raise PermissionError(f"Cannot read XML file: {source}")
         
-        # Read file with proper encoding handling
-        try:
-            with open(source, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Fallback to latin1 if UTF-8 fails
-            with open(source, 'r', encoding='latin1') as f:
-                return f.read()
+        # Raw bytes; the parser decodes them per the XML declaration
+        return open(source, 'rb')
     
     elif source_type == 'url':
         raise NotImplementedError("URL fetching not implemented - use LWP replacement instead")
@@ -223,51 +278,123 @@ def _get_xml_content(source: str, source_type: str) -> str:
     else:
         raise ValueError(f"Unknown source type: {source_type}")
 
-def _xml_element_to_dict(element: ET.Element, options: Dict[str, Any]) -> Union[Dict, str, list]:
+def _resolve_convert_options(options: Dict[str, Any]) -> _ConvertOptions:
+    """Resolve the XML::Simple options used during element conversion"""
+    suppress_empty = options.get('SuppressEmpty')
+    return _ConvertOptions(
+        keep_attributes=not suppress_empty,
+        empty_value='' if suppress_empty == '' else None,
+        empty_as_hash=suppress_empty is not None and suppress_empty != ''
+    )
+
+def _xml_to_dict(xml_content: Union[str, BinaryIO], opts: _ConvertOptions) -> Union[Dict, str, None]:
     """
-    Convert XML element to Perl-compatible dict structure
+    Parse XML into Perl-compatible dict structure
     
     This function replicates XML::Simple's conversion logic:
     - Elements with only text become strings
     - Elements with children become dicts
     - Multiple elements with same name become arrays
     - Attributes are included with @ prefix (if not suppressed)
+    
+    expat callbacks build each element's result as it closes, so no
+    element tree is ever materialized and files are parsed in chunks.
+    Names, text and tails follow ElementTree's rules exactly, and so do
+    undefined entities: expat only skips '&name;' when the document has an
+    external DTD it does not read, and the default handler below turns
+    that into the same "undefined entity" parse error ElementTree raises.
     """
-    result = {}
+    # Same parser configuration ElementTree uses ('{uri}local' names)
+    parser = expat.ParserCreate(None, '}')
+    parser.buffer_text = True
+    parser.ordered_attributes = True
+    
+    keep_attributes = opts.keep_attributes
+    names = {}    # raw expat name -> tag, shared across the whole result
+    attr_keys = {}  # raw expat name -> '@'-prefixed key
+    stack = []    # [tag, result, text parts, still collecting text]
+    roots = []
     
-    # Handle attributes
-    if element.attrib and not options.get('SuppressEmpty'):
-        for attr_name, attr_value in element.attrib.items():
-            # Use @ prefix for attributes (XML::Simple style)
-            result[f'@{attr_name}'] = attr_value
+    def start(name, attrs):
+        tag = names.get(name)
+        if tag is None:
+            tag = names[name] = '{' + name if '}' in name else name
+        
+        result = {}
+        if attrs and keep_attributes:
+            for i in range(0, len(attrs), 2):
+                attr_name = attrs[i]
+                key = attr_keys.get(attr_name)
+                if key is None:
+                    key = attr_keys[attr_name] = '@{' + attr_name if '}' in attr_name else '@' + attr_name
+                result[key] = attrs[i + 1]
+        
+        if stack:
+            # Text after a child is that child's tail, which is dropped
+            stack[-1][3] = False
+        stack.append([tag, result, [], True])
     
-    # Group child elements by tag name
-    children_by_tag = {}
-    for child in element:
-        tag = child.tag
-        if tag not in children_by_tag:
-            children_by_tag[tag] = []
-        children_by_tag[tag].append(child)
+    def data(text):
+        if stack:
+            frame = stack[-1]
+            if frame[3]:
+                frame[2].append(text)
     
-    # Process child elements
-    for tag, children in children_by_tag.items():
-        if len(children) == 1:
-            # Single child - convert to dict/string
-            child_result = _xml_element_to_dict(children[0], options)
-            result[tag] = child_result
+    def default(text):
+        # Same check as ElementTree's XMLParser._default (no custom entities)
+        if text[:1] == '&':
+            err = expat.ExpatError(
+                "undefined entity %s: line %d, column %d" %
+                (text, parser.ErrorLineNumber, parser.ErrorColumnNumber)
+            )
+            err.code = 11  # XML_ERROR_UNDEFINED_ENTITY
+            err.lineno = parser.ErrorLineNumber
+            err.offset = parser.ErrorColumnNumber
+            raise err
+    
+    def end(name):
+        tag, result, parts, _ = stack.pop()
+        value = _finish_element_dict(''.join(parts), result, opts)
+        if stack:
+            _add_child_result(stack[-1][1], tag, value)
         else:
-            # Multiple children with same tag - create array
-            child_array = []
-            for child in children:
-                child_result = _xml_element_to_dict(child, options)
-                child_array.append(child_result)
-            result[tag] = child_array
+            roots.append(value)
+    
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    parser.DefaultHandlerExpand = default
     
+    if isinstance(xml_content, str):
+        parser.Parse(xml_content, True)
+    else:
+        while True:
+            chunk = xml_content.read(_PARSE_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.Parse(chunk, False)
+        parser.Parse(b'', True)
+    
+    return roots[0]
+
+def _add_child_result(result: Dict, tag: str, value: Any) -> None:
+    """Merge a converted child: single child stays scalar, repeated tags become an array"""
+    # Converted elements are never lists, so a list here is always our array
+    existing = result.get(tag, _MISSING)
+    if existing is _MISSING:
+        result[tag] = value
+    elif type(existing) is list:
+        existing.append(value)
+    else:
+        result[tag] = [existing, value]
+
+def _finish_element_dict(text_content: str, result: Dict, opts: _ConvertOptions) -> Union[Dict, str, None]:
+    """Apply element text and empty-element rules to a converted element"""
     # Handle text content
-    text_content = element.text
-    if text_content and text_content.strip():
+    if text_content:
         text_content = text_content.strip()
-        
+    
+    if text_content:
         if result:
             # Element has both text and children/attributes
             # Use 'content' key for text (XML::Simple behavior)
@@ -276,62 +403,61 @@ def _xml_element_to_dict(element: ET.Element, options: Dict[str, Any]) -> Union[
             # Element has only text content
             return text_content
     
-    # Handle empty elements
-    if not result:
-        suppress_empty = options.get('SuppressEmpty')
-        if suppress_empty == '':
-            return ''
-        elif suppress_empty is None:
-            return None
-        elif suppress_empty == 1:
-            return {}
-        else:
-            return {}
+    # Handle empty elements ('' or undef per SuppressEmpty, otherwise an
+    # empty hash - result itself is that fresh empty dict)
+    if not result and not opts.empty_as_hash:
+        return opts.empty_value
     
     return result
 
 def _dict_to_xml_element(data: Any, parent: ET.Element, options: Dict[str, Any]) -> None:
     """Convert Perl data structure to XML elements"""
     
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if key.startswith('@'):
-                # Attribute
-                attr_name = key[1:]  # Remove @ prefix
-                parent.set(attr_name, str(value))
-            elif key == 'content':
-                # Text content
-                if parent.text is None:
-                    parent.text = str(value)
-                else:
-                    parent.text += str(value)
-            else:
-                # Child element
-                if isinstance(value, list):
+    # Explicit work stack of (data, parent) pairs instead of recursion.
+    # Work pushed for a child element never touches its parent, so only
+    # list items (which all target the same parent) need to be replayed
+    # in order - they are pushed in reverse.
+    stack = [(data, parent)]
+    push = stack.append
+    attr_names = _ATTR_NAME_CACHE
+    while stack:
+        data, parent = stack.pop()
+        
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if key and key[0] == '@':
+                    # Attribute - remove @ prefix
+                    attr_name = attr_names.get(key)
+                    if attr_name is None:
+                        attr_name = sys.intern(key[1:])
+                        if len(attr_names) < _ATTR_NAME_CACHE_MAX:
+                            attr_names[key] = attr_name
+                    parent.set(attr_name, str(value))
+                elif key == 'content':
+                    # Text content
+                    if parent.text is None:
+                        parent.text = str(value)
+                    else:
+                        parent.text += str(value)
+                elif isinstance(value, list):
                     # Multiple elements with same name
                     for item in value:
-                        child = ET.SubElement(parent, key)
-                        _dict_to_xml_element(item, child, options)
+                        push((item, ET.SubElement(parent, key)))
                 else:
                     # Single element
-                    child = ET.SubElement(parent, key)
-                    _dict_to_xml_element(value, child, options)
-    
-    elif isinstance(data, list):
-        # Handle list at root level
-        for item in data:
-            _dict_to_xml_element(item, parent, options)
-    
-    else:
-        # Scalar value - set as text content
-        if parent.text is None:
-            parent.text = str(data) if data is not None else ''
+                    push((value, ET.SubElement(parent, key)))
+        
+        elif isinstance(data, list):
+            # Handle list at root level
+            for item in reversed(data):
+                push((item, parent))
+        
         else:
-            parent.text += str(data) if data is not None else ''
-
-def _is_debug_mode() -> bool:
-    """Check if debug mode is enabled"""
-    return os.environ.get('CPAN_BRIDGE_DEBUG', '0') != '0'
+            # Scalar value - set as text content
+            if parent.text is None:
+                parent.text = str(data) if data is not None else ''
+            else:
+                parent.text += str(data) if data is not None else ''
 
 # Test functions for development
 def _test_basic_parsing():
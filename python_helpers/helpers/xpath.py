@@ -8,12 +8,22 @@ Handles all XPath expressions found in the codebase analysis.
 Dependencies: lxml (pip install lxml)
 """
 
-import uuid
+import atexit
+import itertools
 import traceback
 import os
+import re
 import sys
 import tempfile
 import pickle
+import mmap
+import sqlite3
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache, wraps
 from typing import Dict, Any, List, Optional
 
 try:
@@ -23,13 +33,137 @@ except ImportError:
     LXML_AVAILABLE = False
     etree = None
 
-# Global document storage for managing XML documents across calls
-_documents = {}
-_nodes = {}
+# Debug flag is read once at import (see set_debug for runtime changes)
+_DEBUG_MODE = os.environ.get('CPAN_BRIDGE_DEBUG', '0') != '0'
+
+# Shared parser options, fixed at import:
+#   huge_tree lifts libxml2's depth and text-size limits so large workflow
+#     logs parse (CPAN_BRIDGE_XML_HUGE=0 restores the limits)
+#   remove_blank_text drops whitespace-only text nodes, which roughly halves
+#     parse time on pretty-printed files. Off by default: XML::XPath keeps
+#     those nodes, and dropping them changes string(), normalize-space(),
+#     node() positions and counts (CPAN_BRIDGE_XML_DROP_BLANKS=1 opts in
+#     for callers that only read element names, values and attributes)
+#   no_network blocks remote DTD fetches
+_PARSER_OPTIONS = {
+    'huge_tree': os.environ.get('CPAN_BRIDGE_XML_HUGE', '1') != '0',
+    'remove_blank_text': os.environ.get('CPAN_BRIDGE_XML_DROP_BLANKS', '0') != '0',
+}
+_PARSER = etree.XMLParser(no_network=True, **_PARSER_OPTIONS) if LXML_AVAILABLE else None
+
+# XML declaration naming an encoding; lxml refuses those on str input
+_ENCODING_DECL_RE = re.compile(r'\s*<\?xml[^>]*\sencoding\s*=')
+
+# Files at least this large are parsed from an mmap of the file
+_MMAP_MIN_SIZE = 64 * 1024
+
+@dataclass
+class _NodeRecord:
+    """In-memory record of a node handed out to the Perl side"""
+    element: Any
+    document_id: str
+    data: Dict[str, Any]
+    persisted: bool = False
+
+# Global document storage for managing XML documents across calls. Each
+# document owns its node records (doc['nodes']); _nodes is only a weak
+# node_id index over them, so dropping a document releases its nodes and
+# a node that is no longer in memory is rebuilt by _restore_node.
+_documents: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_nodes: 'weakref.WeakValueDictionary[str, _NodeRecord]' = weakref.WeakValueDictionary()
+
+# The daemon serves requests from worker threads, and consecutive calls on
+# one document can land on different threads, so a single lock (not
+# per-thread registries) guards the caches below, the node database and
+# the trees themselves: a query must not run while another thread evicts
+# or disposes its document. Reentrant because public calls nest.
+_registry_lock = threading.RLock()
+
+def _synchronized(func):
+    """Run a public entry point while holding _registry_lock"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with _registry_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+# Memoized handle-free results (bulk_xpath, find_nodes with keep_handles=False)
+# keyed by (document_id, xpath). Results with node handles are never
+# memoized: each call must own its node_ids, or releasing one caller's
+# handles would invalidate another's. Documents are never modified here, so
+# an entry only goes stale when the document is dropped (_invalidate_results)
+_RESULT_CACHE: 'OrderedDict[tuple, List[Dict[str, Any]]]' = OrderedDict()
+_RESULT_CACHE_MAX = 256
+_RESULT_CACHE_MAX_NODES = 5000
+# Functions whose result can differ between calls on the same document
+_UNCACHEABLE_XPATH = ('generate-id', 'current-', 'random')
+
+# Parsed documents kept in memory, least recently used first out; evicted
+# documents are re-parsed from their metadata on next use (0 = no limit)
+_MAX_DOCS = int(os.environ.get('CPAN_BRIDGE_XPATH_MAX_DOCS', '8'))
 
 # Persistent storage directory for cross-process document sharing
 _STORAGE_DIR = os.path.join(tempfile.gettempdir(), 'cpan_xpath_storage')
 
+# SQLite index of node metadata, shared by all documents (opened lazily)
+_node_db = None
+
+# Document and node IDs only need to be unique, so a counter replaces uuid4.
+# They outlive this process in the shared storage directory, so the prefix
+# combines the PID with a few random bytes drawn once, in case of PID reuse.
+_ID_PREFIX = f"{os.getpid():x}{os.urandom(4).hex()}-"
+_ID_COUNTER = itertools.count(1)
+
+# Result nodes with identical attribute sets (e.g. many <version name="1.0">)
+# share one read-only attribute dict; cleared when full to bound memory
+_ATTR_DEDUP: Dict[tuple, Dict[str, str]] = {}
+_ATTR_DEDUP_MAX = 4096
+# Shared by every attribute-less element; like the dedup entries it is
+# only ever serialized, never modified
+_EMPTY_ATTRS: Dict[str, str] = {}
+
+def _generate_id() -> str:
+    """Generate unique document/node identifier"""
+    return f"{_ID_PREFIX}{next(_ID_COUNTER)}"
+
+def _store_document(document_id: str, doc: Dict[str, Any]) -> None:
+    """Add a parsed document to the in-memory cache, evicting the least recently used"""
+    _documents[document_id] = doc
+    while _MAX_DOCS > 0 and len(_documents) > _MAX_DOCS:
+        _evict_document(*_documents.popitem(last=False))
+
+def _invalidate_results(document_id: str) -> None:
+    """Forget memoized find_nodes results for a document"""
+    for key in [key for key in _RESULT_CACHE if key[0] == document_id]:
+        del _RESULT_CACHE[key]
+
+def _evict_document(document_id: str, doc: Dict[str, Any]) -> None:
+    """Release an evicted document's tree; its metadata stays for _restore_document"""
+    _invalidate_results(document_id)
+    # Its nodes can only be restored from here on, so write any not yet saved
+    _persist_nodes(document_id, doc['nodes'].items())
+    _release_document(doc)
+
+def _release_document(doc: Dict[str, Any]) -> None:
+    """Free a document's tree and node records once it leaves the in-memory cache"""
+    doc['nodes'].clear()
+    # Clearing the root frees the libxml2 nodes even if a stray Python
+    # reference to the tree or one of its elements is still alive
+    if doc['root'] is not None:
+        doc['root'].clear(keep_tail=False)
+    doc['tree'] = doc['root'] = None
+
+def _get_document(document_id: str) -> Optional[Dict[str, Any]]:
+    """Get an in-memory document, restoring it if needed, and mark it recently used"""
+    doc = _documents.get(document_id)
+    if doc is None:
+        if not _restore_document(document_id):
+            return None
+        doc = _documents[document_id]
+    else:
+        _documents.move_to_end(document_id)
+    return doc
+
 def _ensure_storage_dir():
     """Ensure persistent storage directory exists"""
     if not os.path.exists(_STORAGE_DIR):
@@ -40,33 +174,119 @@ def _get_document_file(document_id: str) -> str:
     _ensure_storage_dir()
     return os.path.join(_STORAGE_DIR, f'doc_{document_id}.pkl')
 
-def _get_node_file(node_id: str) -> str:
-    """Get file path for node metadata"""
-    _ensure_storage_dir()
-    return os.path.join(_STORAGE_DIR, f'node_{node_id}.pkl')
+def _get_node_db() -> sqlite3.Connection:
+    """Get the shared SQLite index holding node metadata, opening it on first use"""
+    global _node_db
+    if _node_db is None:
+        _ensure_storage_dir()
+        conn = sqlite3.connect(os.path.join(_STORAGE_DIR, 'nodes.db'),
+                               timeout=30, check_same_thread=False)
+        # Node metadata is a cache of XPaths into documents we can re-parse,
+        # so it does not need the fsync cost of a durable journal
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS nodes ("
+            "node_id TEXT PRIMARY KEY, document_id TEXT, xpath TEXT, name TEXT, attrs TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS nodes_document ON nodes(document_id)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS expressions (expression_id TEXT PRIMARY KEY, xpath TEXT)"
+        )
+        _node_db = conn
+    return _node_db
+
+def _save_node_metadata(document_id: str, pending: List[tuple]) -> None:
+    """
+    Save a batch of node metadata to persistent storage in one transaction
 
-def _save_node_metadata(node_id: str, metadata: Dict[str, Any]) -> None:
-    """Save node metadata to persistent storage"""
+    Args:
+        document_id: Document the nodes belong to
+        pending: (node_id, element, name, attributes) tuples queued by _process_node
+    """
+    if not pending:
+        return
     try:
-        file_path = _get_node_file(node_id)
-        with open(file_path, 'wb') as f:
-            pickle.dump(metadata, f)
+        # All queued elements share one tree, so resolve getpath once and
+        # build the positional XPaths here rather than in the result loop
+        getpath = pending[0][1].getroottree().getpath
+        rows = [
+            (node_id, document_id, getpath(element), name, json.dumps(attributes))
+            for node_id, element, name, attributes in pending
+        ]
+        conn = _get_node_db()
+        conn.executemany("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
     except Exception as e:
-        if _is_debug_mode():
+        if _DEBUG_MODE:
             print(f"Warning: Could not save node metadata: {e}", file=sys.stderr)
 
+def _persist_nodes(document_id: str, records) -> None:
+    """
+    Save metadata for node records that have not been persisted yet
+
+    Args:
+        document_id: Document the nodes belong to
+        records: Iterable of (node_id, _NodeRecord) pairs
+    """
+    unsaved = [(node_id, record) for node_id, record in records if not record.persisted]
+    _save_node_metadata(document_id, [
+        (node_id, record.element, record.data['name'], record.data['attributes'])
+        for node_id, record in unsaved
+    ])
+    for _, record in unsaved:
+        record.persisted = True
+
+@_synchronized
+def _persist_all_nodes() -> None:
+    """Save metadata for every unsaved node still in memory"""
+    for document_id, doc in list(_documents.items()):
+        _persist_nodes(document_id, doc['nodes'].items())
+
+# Nodes queried with persist_nodes=False are saved lazily; whatever is
+# still unsaved when the interpreter exits is written out then, so a later
+# bridge process can restore it
+atexit.register(_persist_all_nodes)
+
 def _load_node_metadata(node_id: str) -> Optional[Dict[str, Any]]:
     """Load node metadata from persistent storage"""
     try:
-        file_path = _get_node_file(node_id)
-        if os.path.exists(file_path):
-            with open(file_path, 'rb') as f:
-                return pickle.load(f)
+        row = _get_node_db().execute(
+            "SELECT document_id, xpath, name, attrs FROM nodes WHERE node_id = ?",
+            (node_id,)
+        ).fetchone()
+        if row:
+            return {
+                'document_id': row[0],
+                'xpath_to_node': row[1],
+                'name': row[2],
+                'attributes': json.loads(row[3])
+            }
     except Exception as e:
-        if _is_debug_mode():
+        if _DEBUG_MODE:
             print(f"Warning: Could not load node metadata: {e}", file=sys.stderr)
     return None
 
+def _remove_node_metadata(document_id: str) -> None:
+    """Remove metadata of all nodes belonging to a document"""
+    try:
+        conn = _get_node_db()
+        conn.execute("DELETE FROM nodes WHERE document_id = ?", (document_id,))
+        conn.commit()
+    except Exception as e:
+        if _DEBUG_MODE:
+            print(f"Warning: Could not remove node metadata: {e}", file=sys.stderr)
+
+def _delete_node_metadata(node_ids: List[str]) -> None:
+    """Remove metadata of specific nodes"""
+    try:
+        conn = _get_node_db()
+        conn.executemany("DELETE FROM nodes WHERE node_id = ?", [(nid,) for nid in node_ids])
+        conn.commit()
+    except Exception as e:
+        if _DEBUG_MODE:
+            print(f"Warning: Could not remove node metadata: {e}", file=sys.stderr)
+
 def _restore_node(node_id: str) -> bool:
     """Restore node from persistent storage"""
     metadata = _load_node_metadata(node_id)
@@ -77,12 +297,11 @@ def _restore_node(node_id: str) -> bool:
         document_id = metadata['document_id']
 
         # Ensure document is loaded
-        if document_id not in _documents:
-            if not _restore_document(document_id):
-                return False
+        doc = _get_document(document_id)
+        if doc is None:
+            return False
 
         # Recreate node from XPath
-        doc = _documents[document_id]
         tree = doc['tree']
 
         # Use the stored XPath to find the element again
@@ -95,15 +314,9 @@ def _restore_node(node_id: str) -> bool:
         # Take the first matching element (should be unique)
         element = elements[0]
 
-        # Recreate node data
-        node_data = _process_node(element, document_id)
-
-        # Restore with same node_id
-        _nodes[node_id] = {
-            'element': element,
-            'document_id': document_id,
-            'data': node_data
-        }
+        # Recreate node data under the same node_id
+        _process_node(element, document_id, node_id=node_id)
+        _nodes[node_id].persisted = True
 
         return True
     except Exception:
@@ -113,10 +326,15 @@ def _save_document_metadata(document_id: str, metadata: Dict[str, Any]) -> None:
     """Save document metadata to persistent storage"""
     try:
         file_path = _get_document_file(document_id)
-        with open(file_path, 'wb') as f:
-            pickle.dump(metadata, f)
+        data = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+        # Write to a private temp file and rename it into place, so a
+        # concurrent _restore_document never reads a half-written pickle
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
     except Exception as e:
-        if _is_debug_mode():
+        if _DEBUG_MODE:
             print(f"Warning: Could not save document metadata: {e}", file=sys.stderr)
 
 def _load_document_metadata(document_id: str) -> Optional[Dict[str, Any]]:
@@ -127,7 +345,7 @@ def _load_document_metadata(document_id: str) -> Optional[Dict[str, Any]]:
             with open(file_path, 'rb') as f:
                 return pickle.load(f)
     except Exception as e:
-        if _is_debug_mode():
+        if _DEBUG_MODE:
             print(f"Warning: Could not load document metadata: {e}", file=sys.stderr)
     return None
 
@@ -138,7 +356,7 @@ def _remove_document_metadata(document_id: str) -> None:
         if os.path.exists(file_path):
             os.remove(file_path)
     except Exception as e:
-        if _is_debug_mode():
+        if _DEBUG_MODE:
             print(f"Warning: Could not remove document metadata: {e}", file=sys.stderr)
 
 def _restore_document(document_id: str) -> bool:
@@ -150,25 +368,139 @@ def _restore_document(document_id: str) -> bool:
     try:
         # Reload XML from source
         if 'filename' in metadata:
-            tree = etree.parse(metadata['filename'])
+            tree = _parse_file(metadata['filename'], metadata.get('streaming_tag'))
         elif 'xml_string' in metadata:
-            root = etree.fromstring(metadata['xml_string'].encode('utf-8'))
-            tree = etree.ElementTree(root)
+            tree = etree.ElementTree(_parse_string(metadata['xml_string']))
         else:
             return False
 
         # Restore to in-memory cache
-        _documents[document_id] = {
+        _store_document(document_id, {
             'tree': tree,
             'filename': metadata.get('filename'),
             'source': metadata.get('source', 'file'),
-            'root': tree.getroot()
-        }
+            'root': tree.getroot(),
+            'nodes': {}
+        })
         return True
     except Exception:
         return False
 
-def load_file(filename: str) -> Dict[str, Any]:
+@lru_cache(maxsize=512)
+def _compile_cached_xpath(xpath: str):
+    """Compile an XPath expression once so repeated queries skip re-parsing it"""
+    # Text results are returned as plain strings: the "smart" string wrappers
+    # keep a reference to their parent element that nothing here uses
+    return etree.XPath(xpath, smart_strings=False)
+
+# Fixed expressions used by the XML::XPath scripts this module replaces (see
+# _test_xpath_expressions), compiled at import so the first query of a run
+# does not pay for it and LRU churn can never evict them
+_KNOWN_XPATHS = ("/DocumentMessage/Fax/*", "dependency", "reference", "vm", "parm")
+_PRECOMPILED_XPATHS = {
+    xpath: _compile_cached_xpath.__wrapped__(xpath) for xpath in _KNOWN_XPATHS
+} if LXML_AVAILABLE else {}
+
+# Expressions compiled on request via compile_xpath, by expression_id; they
+# live until release_expression, independent of the LRU cache above
+_expressions: Dict[str, tuple] = {}
+
+def _resolve_expression(expression_id: str) -> tuple:
+    """Get (xpath, compiled) for an expression_id, restoring it if needed"""
+    entry = _expressions.get(expression_id)
+    if entry is None:
+        row = None
+        try:
+            row = _get_node_db().execute(
+                "SELECT xpath FROM expressions WHERE expression_id = ?", (expression_id,)
+            ).fetchone()
+        except Exception as e:
+            if _DEBUG_MODE:
+                print(f"Warning: Could not load expression: {e}", file=sys.stderr)
+        if row is None:
+            raise ValueError(f"Expression not found: {expression_id}")
+        entry = (row[0], _compile_cached_xpath.__wrapped__(row[0]))
+        _expressions[expression_id] = entry
+    return entry
+
+def _query_expression(xpath: Optional[str], expression_id: Optional[str]) -> tuple:
+    """Get (xpath, compiled or None) from whichever of xpath/expression_id was given"""
+    if expression_id:
+        return _resolve_expression(expression_id)
+    if xpath is None:
+        raise ValueError("XPath expression or expression_id required")
+    return xpath, None
+
+def _compile_xpath(xpath: str):
+    """Get the compiled form of an XPath expression"""
+    compiled = _PRECOMPILED_XPATHS.get(xpath)
+    if compiled is None:
+        compiled = _compile_cached_xpath(xpath)
+    return compiled
+
+def _evaluate_xpath(context, xpath: str, variables: Optional[Dict[str, Any]] = None,
+                    compiled=None):
+    """Evaluate a cached (or given) compiled XPath against a tree or element"""
+    if compiled is None:
+        try:
+            compiled = _compile_xpath(xpath)
+        except etree.XPathSyntaxError as e:
+            raise ValueError(f"Invalid XPath expression '{xpath}': {str(e)}")
+
+    try:
+        if variables:
+            return compiled(context, **variables)
+        return compiled(context)
+    except etree.XPathEvalError as e:
+        raise ValueError(f"Invalid XPath expression '{xpath}': {str(e)}")
+
+def _parse_streaming(source, streaming_tag: str):
+    """
+    Parse an XML file incrementally, keeping only subtrees rooted at streaming_tag
+
+    Every other element is dropped as soon as its end tag has been read,
+    unless it still holds a kept subtree, so the ancestors of kept elements
+    (and therefore absolute XPaths into them) survive while the rest of
+    the document never accumulates in memory.
+    """
+    root = None
+    keep_depth = 0
+    for event, elem in etree.iterparse(source, events=('start', 'end'), **_PARSER_OPTIONS):
+        if event == 'start':
+            if root is None:
+                root = elem
+            if keep_depth or elem.tag == streaming_tag:
+                keep_depth += 1
+        elif keep_depth:
+            keep_depth -= 1
+        elif len(elem) == 0 and elem is not root:
+            elem.getparent().remove(elem)
+    return etree.ElementTree(root)
+
+def _parse_file(filename: str, streaming_tag: Optional[str] = None):
+    """Parse an XML file into an lxml tree, streaming it if a tag is given"""
+    with open(filename, 'rb') as f:
+        if streaming_tag:
+            return _parse_streaming(f, streaming_tag)
+        if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+            return etree.parse(f, _PARSER)
+        # Larger files are handed to libxml2 as one mapped buffer straight
+        # from the page cache instead of through its chunked file reader
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            root = etree.fromstring(mm, _PARSER, base_url=filename)
+    return etree.ElementTree(root)
+
+def _parse_string(xml_string):
+    """Parse XML from a str or bytes object and return the root element"""
+    if isinstance(xml_string, bytes):
+        return etree.fromstring(xml_string, _PARSER)
+    # Hand str to lxml as-is so a multi-megabyte payload is not duplicated by
+    # encode(); only a declared encoding forces the bytes route lxml requires
+    if _ENCODING_DECL_RE.match(xml_string):
+        return etree.fromstring(xml_string.encode('utf-8'), _PARSER)
+    return etree.fromstring(xml_string, _PARSER)
+
+def load_file(filename: str, streaming_tag: Optional[str] = None) -> Dict[str, Any]:
     """
     Load XML file and return document ID for subsequent operations
 
@@ -176,6 +508,9 @@ def load_file(filename: str) -> Dict[str, Any]:
 
     Args:
         filename: Path to XML file
+        streaming_tag: Optional element tag to stream for; only subtrees with
+            this tag (and their ancestors) are kept, which bounds memory on
+            very large files whose queries all target those subtrees
 
     Returns:
         Dict containing success status and document_id
@@ -184,33 +519,36 @@ def load_file(filename: str) -> Dict[str, Any]:
         if not LXML_AVAILABLE:
             raise ImportError("lxml library not available - install with: pip install lxml")
 
-        if not os.path.exists(filename):
+        # Parse XML file with lxml; the open() inside _parse_file is the
+        # only existence/permission check, so there is no stat race either
+        try:
+            tree = _parse_file(filename, streaming_tag)
+        except FileNotFoundError:
             raise FileNotFoundError(f"XML file not found: {filename}")
-
-        if not os.access(filename, os.R_OK):
+        except PermissionError:
             raise PermissionError(f"Cannot read XML file: {filename}")
-
-        # Parse XML file with lxml
-        try:
-            tree = etree.parse(filename)
         except etree.XMLSyntaxError as e:
             raise ValueError(f"XML syntax error in {filename}: {str(e)}")
 
         # Generate unique document ID
-        document_id = str(uuid.uuid4())
-
-        # Store document in memory
-        _documents[document_id] = {
-            'tree': tree,
-            'filename': filename,
-            'root': tree.getroot()
-        }
-
-        # Save metadata to persistent storage for cross-process access
-        _save_document_metadata(document_id, {
-            'filename': filename,
-            'source': 'file'
-        })
+        document_id = _generate_id()
+
+        # Store document in memory; parsing above runs outside the lock so
+        # a large file does not hold up queries on other documents
+        with _registry_lock:
+            _store_document(document_id, {
+                'tree': tree,
+                'filename': filename,
+                'root': tree.getroot(),
+                'nodes': {}
+            })
+
+            # Save metadata to persistent storage for cross-process access
+            _save_document_metadata(document_id, {
+                'filename': filename,
+                'source': 'file',
+                'streaming_tag': streaming_tag
+            })
 
         return {
             'success': True,
@@ -224,9 +562,31 @@ def load_file(filename: str) -> Dict[str, Any]:
             'success': False,
             'error': str(e),
             'error_type': type(e).__name__,
-            'traceback': traceback.format_exc() if _is_debug_mode() else None
+            'traceback': traceback.format_exc() if _DEBUG_MODE else None
         }
 
+def load_file_streaming(filename: str, keep_tag: str) -> Dict[str, Any]:
+    """
+    Load a very large XML file keeping only the subtrees rooted at keep_tag
+
+    Same as load_file(filename, streaming_tag=keep_tag); the document is
+    stored like any other, so find_nodes works on it unchanged.
+
+    Args:
+        filename: Path to XML file
+        keep_tag: Tag of the elements (with their subtrees) to keep
+
+    Returns:
+        Dict containing success status and document_id
+    """
+    if not keep_tag:
+        return {
+            'success': False,
+            'error': "keep_tag is required for streaming load",
+            'error_type': 'ValueError'
+        }
+    return load_file(filename, streaming_tag=keep_tag)
+
 def load_xml_string(xml_string: str) -> Dict[str, Any]:
     """
     Load XML from string and return document ID for subsequent operations
@@ -253,30 +613,28 @@ def load_xml_string(xml_string: str) -> Dict[str, Any]:
         # Parse XML string with lxml
         try:
             # Handle both bytes and string input
-            if isinstance(xml_string, bytes):
-                root = etree.fromstring(xml_string)
-            else:
-                root = etree.fromstring(xml_string.encode('utf-8'))
-            tree = etree.ElementTree(root)
+            tree = etree.ElementTree(_parse_string(xml_string))
         except etree.XMLSyntaxError as e:
             raise ValueError(f"XML syntax error in string: {str(e)}")
 
         # Generate unique document ID
-        document_id = str(uuid.uuid4())
+        document_id = _generate_id()
 
         # Store document in memory
-        _documents[document_id] = {
-            'tree': tree,
-            'source': 'string',
-            'root': tree.getroot()
-        }
-
-        # Save metadata to persistent storage for cross-process access
-        # Store the XML string so we can reload the document if needed
-        _save_document_metadata(document_id, {
-            'xml_string': xml_string,
-            'source': 'string'
-        })
+        with _registry_lock:
+            _store_document(document_id, {
+                'tree': tree,
+                'source': 'string',
+                'root': tree.getroot(),
+                'nodes': {}
+            })
+
+            # Save metadata to persistent storage for cross-process access
+            # Store the XML string so we can reload the document if needed
+            _save_document_metadata(document_id, {
+                'xml_string': xml_string,
+                'source': 'string'
+            })
 
         return {
             'success': True,
@@ -290,10 +648,16 @@ def load_xml_string(xml_string: str) -> Dict[str, Any]:
             'success': False,
             'error': str(e),
             'error_type': type(e).__name__,
-            'traceback': traceback.format_exc() if _is_debug_mode() else None
+            'traceback': traceback.format_exc() if _DEBUG_MODE else None
         }
 
-def find_nodes(document_id: str, xpath: str) -> Dict[str, Any]:
+@_synchronized
+def find_nodes(document_id: str, xpath: Optional[str] = None,
+               variables: Optional[Dict[str, Any]] = None,
+               count_only: bool = False,
+               persist_nodes: bool = True,
+               keep_handles: bool = True,
+               expression_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Execute XPath query on document and return matching nodes
 
@@ -302,31 +666,57 @@ def find_nodes(document_id: str, xpath: str) -> Dict[str, Any]:
     Args:
         document_id: Document identifier from load_file
         xpath: XPath expression to execute
+        variables: Optional values for $name variables used in the expression
+        count_only: Only report the number of matches (for NodeSet size checks),
+            skipping node ids, text/attribute extraction and persistence
+        persist_nodes: Save node metadata for cross-process restore right away
+            (default). The bridge retries failed daemon calls in a fresh
+            process, which can only restore nodes from saved metadata, so
+            False (saved on eviction, at exit or via pin_node) is only safe
+            when the nodes are never queried again
+        keep_handles: Register result nodes so they can be queried later with
+            find_in_node; False returns name/value/attributes without node_id
+        expression_id: Expression from compile_xpath, used instead of xpath
 
     Returns:
         Dict containing success status and node data
     """
     try:
+        xpath, compiled = _query_expression(xpath, expression_id)
+
         # Try to restore document if not in memory
-        if document_id not in _documents:
-            if not _restore_document(document_id):
-                raise ValueError(f"Document not found: {document_id}")
+        doc = _get_document(document_id)
+        if doc is None:
+            raise ValueError(f"Document not found: {document_id}")
         
-        doc = _documents[document_id]
         tree = doc['tree']
+
+        # Handle-free results may come from the memo; copy them so callers
+        # never mutate the cached entries
+        if not keep_handles and not count_only:
+            node_data = [dict(n) for n in
+                         _handle_free_results(document_id, tree, xpath, variables, compiled)]
+            return {
+                'success': True,
+                'result': {
+                    'nodes': node_data,
+                    'size': len(node_data)
+                }
+            }
         
         # Execute XPath query
-        try:
-            nodes = tree.xpath(xpath)
-        except etree.XPathEvalError as e:
-            raise ValueError(f"Invalid XPath expression '{xpath}': {str(e)}")
+        nodes = _evaluate_xpath(tree, xpath, variables, compiled)
+
+        if count_only:
+            return {
+                'success': True,
+                'result': {
+                    'size': len(nodes) if isinstance(nodes, list) else 1
+                }
+            }
         
         # Process results
-        node_data = []
-        for node in nodes:
-            node_info = _process_node(node, document_id)
-            if node_info:
-                node_data.append(node_info)
+        node_data = _process_nodes(nodes, document_id, persist_nodes, keep_handles)
         
         return {
             'success': True,
@@ -341,10 +731,15 @@ def find_nodes(document_id: str, xpath: str) -> Dict[str, Any]:
             'success': False,
             'error': str(e),
             'error_type': type(e).__name__,
-            'traceback': traceback.format_exc() if _is_debug_mode() else None
+            'traceback': traceback.format_exc() if _DEBUG_MODE else None
         }
 
-def find_in_node(node_id: str, xpath: str) -> Dict[str, Any]:
+@_synchronized
+def find_in_node(node_id: str, xpath: Optional[str] = None,
+                 variables: Optional[Dict[str, Any]] = None,
+                 persist_nodes: bool = True,
+                 keep_handles: bool = True,
+                 expression_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Execute XPath query within a specific node context
 
@@ -353,31 +748,34 @@ def find_in_node(node_id: str, xpath: str) -> Dict[str, Any]:
     Args:
         node_id: Node identifier
         xpath: XPath expression relative to the node
+        variables: Optional values for $name variables used in the expression
+        persist_nodes: Save node metadata right away (see find_nodes)
+        keep_handles: Register result nodes for later queries (see find_nodes)
+        expression_id: Expression from compile_xpath, used instead of xpath
 
     Returns:
         Dict containing success status and node data
     """
     try:
+        xpath, compiled = _query_expression(xpath, expression_id)
+
         # Try to restore node if not in memory
-        if node_id not in _nodes:
+        record = _nodes.get(node_id)
+        if record is None:
             if not _restore_node(node_id):
                 raise ValueError(f"Node not found: {node_id}")
+            record = _nodes[node_id]
         
-        node_info = _nodes[node_id]
-        element = node_info['element']
+        element = record.element
+        document_id = record.document_id
+        if document_id in _documents:
+            _documents.move_to_end(document_id)
         
         # Execute XPath query relative to this node
-        try:
-            nodes = element.xpath(xpath)
-        except etree.XPathEvalError as e:
-            raise ValueError(f"Invalid XPath expression '{xpath}': {str(e)}")
+        nodes = _evaluate_xpath(element, xpath, variables, compiled)
         
         # Process results
-        node_data = []
-        for node in nodes:
-            node_info = _process_node(node, node_info['document_id'])
-            if node_info:
-                node_data.append(node_info)
+        node_data = _process_nodes(nodes, document_id, persist_nodes, keep_handles)
         
         return {
             'success': True,
@@ -394,6 +792,152 @@ def find_in_node(node_id: str, xpath: str) -> Dict[str, Any]:
             'error_type': type(e).__name__
         }
 
+@_synchronized
+def compile_xpath(xpath: str) -> Dict[str, Any]:
+    """
+    Compile an XPath expression once for repeated use
+
+    The returned expression_id can be passed to find_nodes, find_in_node
+    and bulk_xpath instead of the expression text. Compiled expressions
+    are safe to evaluate from several threads at once.
+
+    Args:
+        xpath: XPath expression to compile
+
+    Returns:
+        Dict containing success status and expression_id
+    """
+    try:
+        try:
+            compiled = _compile_cached_xpath.__wrapped__(xpath)
+        except etree.XPathSyntaxError as e:
+            raise ValueError(f"Invalid XPath expression '{xpath}': {str(e)}")
+
+        expression_id = _generate_id()
+        _expressions[expression_id] = (xpath, compiled)
+
+        # Saved so a later bridge process can recompile it from the id
+        try:
+            conn = _get_node_db()
+            conn.execute("INSERT OR REPLACE INTO expressions VALUES (?, ?)", (expression_id, xpath))
+            conn.commit()
+        except Exception as e:
+            if _DEBUG_MODE:
+                print(f"Warning: Could not save expression: {e}", file=sys.stderr)
+
+        return {
+            'success': True,
+            'result': {
+                'expression_id': expression_id
+            }
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+@_synchronized
+def release_expression(expression_id: str) -> Dict[str, Any]:
+    """
+    Release an expression compiled with compile_xpath
+
+    Args:
+        expression_id: Expression identifier
+
+    Returns:
+        Dict containing success status
+    """
+    try:
+        _expressions.pop(expression_id, None)
+        try:
+            conn = _get_node_db()
+            conn.execute("DELETE FROM expressions WHERE expression_id = ?", (expression_id,))
+            conn.commit()
+        except Exception as e:
+            if _DEBUG_MODE:
+                print(f"Warning: Could not remove expression: {e}", file=sys.stderr)
+
+        return {
+            'success': True,
+            'result': {
+                'expression_id': expression_id
+            }
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+_BULK_FIELDS = ('name', 'value', 'attributes')
+
+@_synchronized
+def bulk_xpath(document_id: str, xpath: Optional[str] = None,
+               fields: Optional[List[str]] = None,
+               variables: Optional[Dict[str, Any]] = None,
+               expression_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Execute XPath query and return only the requested fields of every match
+
+    For callers that read each node once and never query inside it: no
+    node handles are registered or persisted, and each match is a plain
+    list ordered like fields instead of a per-node dict. The rows go out
+    as part of the normal response rather than a separately encoded
+    payload, so the bridge still serializes the result exactly once.
+
+    Args:
+        document_id: Document identifier from load_file
+        xpath: XPath expression to execute
+        fields: Subset of 'name', 'value', 'attributes' (default: all three)
+        variables: Optional values for $name variables used in the expression
+        expression_id: Expression from compile_xpath, used instead of xpath
+
+    Returns:
+        Dict containing success status, field names and result rows
+    """
+    try:
+        xpath, compiled = _query_expression(xpath, expression_id)
+
+        fields = list(fields) if fields else list(_BULK_FIELDS)
+        unknown = [f for f in fields if f not in _BULK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown bulk_xpath fields: {', '.join(unknown)}")
+
+        doc = _get_document(document_id)
+        if doc is None:
+            raise ValueError(f"Document not found: {document_id}")
+
+        # Rows are built fresh, so the (possibly memoized) dicts are only read;
+        # non-element results carry just a value
+        node_data = _handle_free_results(document_id, doc['tree'], xpath, variables, compiled)
+        defaults = {'name': '', 'value': '', 'attributes': _EMPTY_ATTRS}
+        rows = [
+            [data.get(f, defaults[f]) for f in fields]
+            for data in node_data
+        ]
+
+        return {
+            'success': True,
+            'result': {
+                'fields': fields,
+                'rows': rows,
+                'size': len(rows)
+            }
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+@_synchronized
 def dispose_document(document_id: str) -> Dict[str, Any]:
     """
     Clean up document resources
@@ -405,20 +949,16 @@ def dispose_document(document_id: str) -> Dict[str, Any]:
         Dict containing success status
     """
     try:
-        # Clean up in-memory document
-        if document_id in _documents:
-            del _documents[document_id]
-
-        # Clean up associated nodes
-        nodes_to_remove = [
-            nid for nid, node_info in _nodes.items()
-            if node_info['document_id'] == document_id
-        ]
-        for nid in nodes_to_remove:
-            del _nodes[nid]
+        # Clean up in-memory document; its node records go with it and
+        # drop out of the weak _nodes index
+        doc = _documents.pop(document_id, None)
+        if doc is not None:
+            _release_document(doc)
+        _invalidate_results(document_id)
 
         # Clean up persistent storage
         _remove_document_metadata(document_id)
+        _remove_node_metadata(document_id)
 
         return {
             'success': True,
@@ -432,13 +972,190 @@ def dispose_document(document_id: str) -> Dict[str, Any]:
             'error_type': type(e).__name__
         }
 
-def _process_node(element, document_id: str) -> Optional[Dict[str, Any]]:
+@_synchronized
+def get_node_data(node_id: str) -> Dict[str, Any]:
+    """
+    Get name, value and attributes of a node by its handle
+
+    Lets a caller that kept only node_ids (e.g. from find_nodes results it
+    passed along) fetch the details for the nodes it actually inspects.
+
+    Args:
+        node_id: Node identifier
+
+    Returns:
+        Dict containing success status and node data
+    """
+    try:
+        record = _nodes.get(node_id)
+        if record is None:
+            if not _restore_node(node_id):
+                raise ValueError(f"Node not found: {node_id}")
+            record = _nodes[node_id]
+
+        return {
+            'success': True,
+            'result': record.data
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+def release_node(node_id: str) -> Dict[str, Any]:
+    """
+    Release a node handle the caller no longer needs
+
+    Args:
+        node_id: Node identifier
+
+    Returns:
+        Dict containing success status
+    """
+    return release_nodes([node_id])
+
+@_synchronized
+def release_nodes(node_ids: List[str]) -> Dict[str, Any]:
+    """
+    Release node handles the caller no longer needs
+
+    Drops the in-memory records (and with them the element references)
+    and the persisted metadata; unknown IDs are ignored.
+
+    Args:
+        node_ids: Node identifiers
+
+    Returns:
+        Dict containing success status and number of handles released
+    """
+    try:
+        released = 0
+        for node_id in node_ids:
+            record = _nodes.pop(node_id, None)
+            if record is None:
+                continue
+            doc = _documents.get(record.document_id)
+            if doc is not None:
+                doc['nodes'].pop(node_id, None)
+            released += 1
+        _delete_node_metadata(node_ids)
+
+        return {
+            'success': True,
+            'result': {
+                'released': released
+            }
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+@_synchronized
+def pin_node(node_id: str) -> Dict[str, Any]:
+    """
+    Persist a node's metadata now so other bridge processes can restore it
+
+    Only needed for nodes returned with persist_nodes=False, whose metadata
+    is otherwise saved lazily.
+
+    Args:
+        node_id: Node identifier
+
+    Returns:
+        Dict containing success status
+    """
+    try:
+        record = _nodes.get(node_id)
+        if record is not None:
+            _persist_nodes(record.document_id, [(node_id, record)])
+        elif _load_node_metadata(node_id) is None:
+            raise ValueError(f"Node not found: {node_id}")
+
+        return {
+            'success': True,
+            'result': 'Node pinned'
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+def _handle_free_results(document_id: str, tree, xpath: str,
+                         variables: Optional[Dict[str, Any]], compiled) -> List[Dict[str, Any]]:
+    """Evaluate a query into node data without handles, memoized per document"""
+    cache_key = None
+    if not variables and not any(name in xpath for name in _UNCACHEABLE_XPATH):
+        cache_key = (document_id, xpath)
+        cached = _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            _RESULT_CACHE.move_to_end(cache_key)
+            return cached
+
+    nodes = _evaluate_xpath(tree, xpath, variables, compiled)
+    node_data = _process_nodes(nodes, document_id, persist=False, keep_handles=False)
+
+    if cache_key is not None and len(node_data) <= _RESULT_CACHE_MAX_NODES:
+        _RESULT_CACHE[cache_key] = node_data
+        if len(_RESULT_CACHE) > _RESULT_CACHE_MAX:
+            _RESULT_CACHE.popitem(last=False)
+    return node_data
+
+def _process_nodes(nodes, document_id: str, persist: bool = True,
+                   keep_handles: bool = True) -> List[Dict[str, Any]]:
+    """
+    Convert XPath results to node data, persisting their metadata in one batch
+
+    Only elements get a node_id (and metadata); text, attribute and
+    comment results, namespace (prefix, uri) pairs and scalar results are
+    returned as plain values.
+
+    Args:
+        nodes: Result list of an XPath evaluation
+        document_id: Document the results belong to
+        persist: Save node metadata now instead of leaving it to _persist_nodes
+        keep_handles: Register elements under a node_id (False skips registry)
+
+    Returns:
+        List of node data dicts, in result order
+    """
+    # count(), string(), boolean() etc. evaluate to a single value
+    if not isinstance(nodes, list):
+        return [{'value': nodes}]
+
+    pending = [] if persist and keep_handles else None
+    node_data = [
+        (_process_node(node, document_id, pending) if keep_handles else _node_data(node))
+        if _is_element(node)
+        else {'value': node.text or '' if isinstance(node, etree._Element) else node}
+        for node in nodes
+    ]
+    _save_node_metadata(document_id, pending)
+    return node_data
+
+def _is_element(node) -> bool:
+    """Check whether an XPath result is an element (not text, attribute or comment)"""
+    return isinstance(node, etree._Element) and isinstance(node.tag, str)
+
+def _process_node(element, document_id: str, pending: Optional[List[tuple]] = None,
+                  node_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Convert lxml element to node data structure for Perl consumption
     
     Args:
         element: lxml element object
         document_id: Associated document ID
+        pending: Optional list collecting nodes for _save_node_metadata
+        node_id: Existing node ID to register under (when restoring)
         
     Returns:
         Dict containing node information
@@ -447,62 +1164,86 @@ def _process_node(element, document_id: str) -> Optional[Dict[str, Any]]:
         return None
     
     # Generate unique node ID
-    node_id = str(uuid.uuid4())
-    
-    # Extract element information
-    name = element.tag if hasattr(element, 'tag') else ''
+    if node_id is None:
+        node_id = _generate_id()
+
+    node_data = _node_data(element)
+    node_data['node_id'] = node_id
+
+    # Store node for later reference (in-memory), owned by its document
+    record = _NodeRecord(element, document_id, node_data, pending is not None)
+    _documents[document_id]['nodes'][node_id] = record
+    _nodes[node_id] = record
+
+    # Queue node metadata for persistent storage (cross-process access);
+    # the caller writes the whole batch, XPath included, after the result loop
+    if pending is not None:
+        pending.append((node_id, element, node_data['name'], node_data['attributes']))
+
+    return node_data
+
+def _node_data(element) -> Dict[str, Any]:
+    """
+    Extract name, text value and attributes of an lxml element
+
+    Args:
+        element: lxml element object
+
+    Returns:
+        Dict with name, value and attributes (no node handle)
+    """
+    # Only elements reach here (_process_nodes routes text, attribute and
+    # scalar results elsewhere), so tag/text/attrib are always present
+    name = element.tag
     
     # Get text content (matches XML::XPath string_value behavior)
-    text_content = ''
-    if hasattr(element, 'text') and element.text:
-        text_content = element.text.strip()
+    text = element.text
+    text_content = text.strip() if text else ''
     
-    # If no direct text, get all text content (including from children)
-    if not text_content and hasattr(element, 'xpath'):
-        try:
-            text_nodes = element.xpath('.//text()')
-            if text_nodes:
-                text_content = ''.join(str(t).strip() for t in text_nodes if str(t).strip())
-        except:
-            pass
+    # If no direct text, get all text content (including from children).
+    # itertext() walks the same text nodes as './/text()' without going
+    # through the XPath engine; each fragment is stripped as before.
+    if not text_content:
+        text_content = ''.join([t.strip() for t in element.itertext()])
     
-    # Get attributes
-    attributes = {}
-    if hasattr(element, 'attrib'):
-        attributes = dict(element.attrib)
-
-    # Generate XPath to this specific element for persistence
-    # Use getroottree().getpath() to get a unique XPath
-    xpath_to_node = element.getroottree().getpath(element) if hasattr(element, 'getroottree') else None
-
-    node_data = {
+    # Get attributes (shared with other nodes carrying the same set)
+    attributes = _EMPTY_ATTRS
+    attrib = element.attrib
+    if attrib:
+        items = tuple(attrib.items())
+        attributes = _ATTR_DEDUP.get(items)
+        if attributes is None:
+            attributes = {sys.intern(k): v for k, v in items}
+            if len(_ATTR_DEDUP) >= _ATTR_DEDUP_MAX:
+                _ATTR_DEDUP.clear()
+            _ATTR_DEDUP[items] = attributes
+
+    return {
         'name': name,
         'value': text_content,
-        'attributes': attributes,
-        'node_id': node_id
+        'attributes': attributes
     }
 
-    # Store node for later reference (in-memory)
-    _nodes[node_id] = {
-        'element': element,
-        'document_id': document_id,
-        'data': node_data
-    }
+def set_debug(enabled: bool) -> Dict[str, Any]:
+    """
+    Enable or disable debug output at runtime
 
-    # Save node metadata to persistent storage for cross-process access
-    if xpath_to_node:
-        _save_node_metadata(node_id, {
-            'document_id': document_id,
-            'xpath_to_node': xpath_to_node,
-            'name': name,
-            'attributes': attributes
-        })
+    CPAN_BRIDGE_DEBUG is only read once, at import; this overrides it.
 
-    return node_data
+    Args:
+        enabled: True to include tracebacks and storage warnings
 
-def _is_debug_mode() -> bool:
-    """Check if debug mode is enabled"""
-    return os.environ.get('CPAN_BRIDGE_DEBUG', '0') != '0'
+    Returns:
+        Dict containing success status and the new debug setting
+    """
+    global _DEBUG_MODE
+    _DEBUG_MODE = bool(enabled)
+    return {
+        'success': True,
+        'result': {
+            'debug': _DEBUG_MODE
+        }
+    }
 
 def check_lxml_availability() -> Dict[str, Any]:
     """
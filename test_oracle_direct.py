@@ -7,15 +7,21 @@ Usage: python test_oracle_direct.py
 import sys
 import os
 
-# Add the helpers directory to Python path
-script_dir = os.path.dirname(os.path.abspath(__file__))
-helpers_dir = os.path.join(script_dir, 'python_helpers', 'helpers')
-sys.path.insert(0, helpers_dir)
-
-import database
+def _database():
+    """Import database.py from the helpers directory on first use"""
+    # Done here rather than at import so test collection does not pay for
+    # the sys.path change and the database module/driver initialization
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    helpers_dir = os.path.join(script_dir, 'python_helpers', 'helpers')
+    if helpers_dir not in sys.path:
+        sys.path.insert(0, helpers_dir)
+
+    import database
+    return database
 
 def test_oracle_connection():
     """Test Oracle database connection"""
+    database = _database()
 
     # Replace these with your actual Oracle credentials
     dsn = input("Enter Oracle DSN (e.g., 'dbi:Oracle:localhost:1521:XE' or TNS name): ").strip()
@@ -98,6 +104,7 @@ def test_dsn_parsing():
     """Test DSN parsing functionality"""
 
     print("\n🔍 Testing DSN parsing...")
+    database = _database()
 
     test_dsns = [
         "dbi:Oracle:localhost:1521:XE",
@@ -109,10 +116,8 @@ def test_dsn_parsing():
     for dsn in test_dsns:
         print(f"\nParsing DSN: {dsn}")
         try:
-            from database import _parse_oracle_dsn
-
             # Test Oracle DSN parsing
-            oracle_params = _parse_oracle_dsn(dsn)
+            oracle_params = database._parse_oracle_dsn(dsn)
             print(f"  Oracle params: {oracle_params}")
 
         except Exception as e: